@@ -14,10 +14,14 @@ Features:
 
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional, List, Dict, Any, Literal
-from enum import Enum
-from datetime import datetime, time
-import json
+from typing import Optional, List, Dict, Any, Literal, Final, Tuple, get_args
+from datetime import datetime
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from types import MappingProxyType
+import orjson
+import re
 
 # Initialize MCP server
 mcp = FastMCP("fittrack_mcp")
@@ -29,90 +33,147 @@ LATE_MEAL_WARNING_HOUR = 21  # 9 PM
 
 # AC-Joint Safe Exercises
 AC_JOINT_SAFE_EXERCISES = {
-    "pressing": [
+    "pressing": (
         "Landmine Press",
         "Scapular Plane DB Press (30-45° angle)",
         "Neutral Grip DB Press",
         "Low Incline Press (<30°)",
         "Floor Press"
-    ],
-    "pulling": [
+    ),
+    "pulling": (
         "Face Pulls",
         "Cable Rows (all variations)",
         "DB Rows",
         "Lat Pulldowns (neutral/underhand grip)",
         "Scapular Retraction Exercises"
-    ],
-    "lower_body_standing": [
+    ),
+    "lower_body_standing": (
         "Goblet Squats",
         "Split Squats",
         "Single-Leg RDL",
         "Landmine Squats",
         "Step-ups"
-    ],
-    "serratus_lower_trap_focus": [
+    ),
+    "serratus_lower_trap_focus": (
         "Serratus Wall Slides",
         "Bear Crawls",
         "Scapular Push-ups",
         "Lower Trap Y-Raises (prone)",
         "Prone T-Raises",
         "Band Pull-aparts (varied angles)"
-    ],
-    "core_standing": [
+    ),
+    "core_standing": (
         "Pallof Press",
         "Landmine Rotations",
         "Anti-Rotation Band Work",
         "Single-Leg Deadlift (balance component)"
-    ]
+    )
 }
 
 # Unsafe exercises for AC joint
-AC_JOINT_UNSAFE = [
-    "Bench Press (flat)", 
+AC_JOINT_UNSAFE = (
+    "Bench Press (flat)",
     "Overhead Press (strict)",
     "Dips",
     "Wide-grip exercises",
     "Heavy cross-body movements"
-]
+)
+
+# Exact-name lookups (lower-cased) for the common case where the input is a
+# database entry, checked before the substring classifier
+_EXACT_UNSAFE = frozenset(ex.lower() for ex in AC_JOINT_UNSAFE)
+_EXACT_SAFE = {
+    ex.lower(): category
+    for category, exercises in AC_JOINT_SAFE_EXERCISES.items()
+    for ex in exercises
+}
+
+# Column layout of the safe library for single-pass scans: parallel name and
+# category-index tuples, with the category key recovered via _CATEGORY_NAMES
+_CATEGORY_NAMES = tuple(AC_JOINT_SAFE_EXERCISES)
+_EXERCISE_NAMES = tuple(ex for exercises in AC_JOINT_SAFE_EXERCISES.values() for ex in exercises)
+_EXERCISE_CATEGORY_IDX = tuple(
+    idx for idx, exercises in enumerate(AC_JOINT_SAFE_EXERCISES.values()) for _ in exercises
+)
+
+# Lower-cased copies for case-insensitive matching, computed once
+_EXERCISE_NAMES_LC = tuple(ex.lower() for ex in _EXERCISE_NAMES)
+_AC_JOINT_UNSAFE_LC = tuple(ex.lower() for ex in AC_JOINT_UNSAFE)
+
+# One alternation over the unsafe table, so rejecting an input is a single regex scan
+_AC_JOINT_UNSAFE_RE = re.compile("|".join(map(re.escape, _AC_JOINT_UNSAFE_LC)))
+
+# Lower-cased names joined into one string so a search is a few str.find calls;
+# _EXERCISE_OFFSETS holds each name's start position for mapping hits back
+_EXERCISE_HAYSTACK = "\n".join(_EXERCISE_NAMES_LC)
+_EXERCISE_OFFSETS = tuple(
+    accumulate((len(ex) + 1 for ex in _EXERCISE_NAMES_LC[:-1]), initial=0)
+)
 
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
 
-class IntensityLevel(str, Enum):
-    """RPE-based intensity levels"""
-    RPE_6 = "6 - Very light"
-    RPE_7 = "7 - Light"
-    RPE_8 = "8 - Moderate"
-    RPE_9 = "9 - Hard"
-    RPE_10 = "10 - Maximum effort"
-
-class ResponseFormat(str, Enum):
-    """Output format options"""
-    MARKDOWN = "markdown"
-    JSON = "json"
-
-class ExerciseCategory(str, Enum):
-    """Exercise categories for filtering"""
-    PRESSING = "pressing"
-    PULLING = "pulling"
-    LOWER_BODY = "lower_body"
-    SERRATUS_FOCUS = "serratus_lower_trap"
-    CORE = "core"
-    REHAB = "rehab"
-
-class RehabCondition(str, Enum):
-    """Available rehab protocols"""
-    AC_JOINT = "ac_joint_arthritis"
-    BICEP = "bicep_tendonitis"
-    CERVICAL = "cervical_spine_arthritis"
-    SCAPULAR_WINGING = "scapular_winging"
-    ANKLE_POST_SURGERY = "ankle_post_surgery"
-    MENISCUS_POST_SURGERY = "meniscus_post_surgery"
+# RPE-based intensity levels
+IntensityLevel = Literal[
+    "6 - Very light",
+    "7 - Light",
+    "8 - Moderate",
+    "9 - Hard",
+    "10 - Maximum effort"
+]
+
+# Numeric RPE for each intensity level, and the sweat-rate multiplier indexed by it
+_RPE_TO_INT: Final[Dict[str, int]] = {
+    "6 - Very light": 6,
+    "7 - Light": 7,
+    "8 - Moderate": 8,
+    "9 - Hard": 9,
+    "10 - Maximum effort": 10
+}
+_RPE_MULTIPLIER: Final[Tuple[float, ...]] = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.7, 0.8, 1.0, 1.3, 1.5)
+
+# (°F threshold, sweat-rate multiplier) for temperatures above each threshold, hottest first
+_TEMP_MULTIPLIERS: Final[Tuple[Tuple[int, float], ...]] = ((90, 1.4), (80, 1.2))
+
+# Output format options
+ResponseFormat = Literal["markdown", "json"]
+
+# Exercise categories for filtering
+ExerciseCategory = Literal[
+    "pressing",
+    "pulling",
+    "lower_body",
+    "serratus_lower_trap",
+    "core",
+    "rehab"
+]
+
+# ExerciseCategory filter -> AC_JOINT_SAFE_EXERCISES key ("rehab" has no library section)
+_CATEGORY_KEY: Dict[str, str] = {
+    "pressing": "pressing",
+    "pulling": "pulling",
+    "lower_body": "lower_body_standing",
+    "serratus_lower_trap": "serratus_lower_trap_focus",
+    "core": "core_standing"
+}
+
+# Available rehab protocols
+RehabCondition = Literal[
+    "ac_joint_arthritis",
+    "bicep_tendonitis",
+    "cervical_spine_arthritis",
+    "scapular_winging",
+    "ankle_post_surgery",
+    "meniscus_post_surgery"
+]
+
+# Shared by all tool input models (request DTOs are immutable once validated)
+_INPUT_CONFIG = ConfigDict(str_strip_whitespace=True, frozen=True)
 
 class LogWorkoutInput(BaseModel):
     """Input for logging workout sessions"""
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    model_config = _INPUT_CONFIG
     
     exercise_name: str = Field(..., description="Name of exercise (e.g., 'Landmine Press', 'Face Pulls')", min_length=1)
     sets: int = Field(..., description="Number of sets completed", ge=1, le=10)
@@ -120,11 +181,11 @@ class LogWorkoutInput(BaseModel):
     weight_lbs: Optional[float] = Field(None, description="Weight used in pounds", ge=0)
     rpe: IntensityLevel = Field(..., description="Rate of Perceived Exertion (6-10 scale)")
     notes: Optional[str] = Field(None, description="Additional notes (form checks, pain, etc.)", max_length=500)
-    response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format")
+    response_format: ResponseFormat = Field(default="markdown", description="Output format")
 
 class CalculateHydrationInput(BaseModel):
     """Input for hydration calculations (hyperhidrosis-aware)"""
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    model_config = _INPUT_CONFIG
     
     workout_duration_minutes: int = Field(..., description="Workout duration in minutes", ge=15, le=240)
     intensity: IntensityLevel = Field(..., description="Workout intensity (RPE scale)")
@@ -135,440 +196,493 @@ class CalculateHydrationInput(BaseModel):
         ge=1.0,
         le=5.0
     )
-    response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format")
+    response_format: ResponseFormat = Field(default="markdown", description="Output format")
 
 class LogNutritionInput(BaseModel):
     """Input for meal logging with late-meal guardrails"""
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    model_config = _INPUT_CONFIG
     
-    meal_time: str = Field(..., description="Meal time in HH:MM format (24-hour)", pattern=r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$')
+    meal_time: str = Field(..., description="Meal time in HH:MM format (24-hour)", json_schema_extra={"pattern": r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$'})
     meal_description: str = Field(..., description="Brief meal description", min_length=1, max_length=200)
     protein_g: Optional[int] = Field(None, description="Protein in grams", ge=0, le=300)
     carbs_g: Optional[int] = Field(None, description="Carbs in grams", ge=0, le=500)
     fat_g: Optional[int] = Field(None, description="Fat in grams", ge=0, le=200)
     calories: Optional[int] = Field(None, description="Total calories", ge=0, le=5000)
-    response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format")
+    response_format: ResponseFormat = Field(default="markdown", description="Output format")
+
+    @field_validator("meal_time")
+    @classmethod
+    def validate_meal_time(cls, v: str) -> str:
+        """Accept H:MM or HH:MM (24-hour) via integer range checks"""
+        hour, sep, minute = v.partition(":")
+        if not (
+            sep
+            and 1 <= len(hour) <= 2
+            and len(minute) == 2
+            and hour.isascii() and hour.isdigit()
+            and minute.isascii() and minute.isdigit()
+            and int(hour) <= 23
+            and int(minute) <= 59
+        ):
+            raise ValueError("meal_time must be in HH:MM format (24-hour)")
+        return v
 
 class GetExerciseLibraryInput(BaseModel):
     """Input for exercise library queries"""
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    model_config = _INPUT_CONFIG
     
     category: Optional[ExerciseCategory] = Field(None, description="Filter by exercise category")
     search_term: Optional[str] = Field(None, description="Search for specific exercises", max_length=50)
-    response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format")
+    response_format: ResponseFormat = Field(default="markdown", description="Output format")
 
 class GetRehabProtocolInput(BaseModel):
     """Input for PT/rehab protocol queries"""
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    model_config = _INPUT_CONFIG
     
     condition: RehabCondition = Field(..., description="Rehab condition to get protocol for")
     phase: Optional[int] = Field(None, description="Specific phase number (1-4)", ge=1, le=4)
-    response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format")
+    response_format: ResponseFormat = Field(default="markdown", description="Output format")
 
 # ============================================================================
 # REHAB PROTOCOL DATABASE
 # ============================================================================
 
-REHAB_PROTOCOLS = {
+# Read-only view of the top level (shallow); the nested dicts are static by convention
+REHAB_PROTOCOLS = MappingProxyType({
     "ac_joint_arthritis": {
         "name": "AC Joint Arthritis Rehabilitation",
         "overview": "Evidence-based protocol for managing AC joint osteoarthritis. Focus on scapular stabilization, pain reduction, and avoiding overhead/cross-body movements.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Pain Control & Initial Mobility (Weeks 1-3)",
-                "goals": ["Reduce inflammation", "Restore pain-free ROM", "Begin gentle scapular activation"],
-                "exercises": [
+                "goals": ("Reduce inflammation", "Restore pain-free ROM", "Begin gentle scapular activation"),
+                "exercises": (
                     {"name": "Pendulum exercises", "sets": 3, "reps": 20, "frequency": "3x/day", "notes": "Gentle, pain-free circles"},
                     {"name": "Supine shoulder flexion with dowel", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "Use unaffected arm to assist"},
                     {"name": "Scapular retraction (isometric)", "sets": 3, "reps": "10-sec hold", "frequency": "2x/day", "notes": "Squeeze shoulder blades together"},
                     {"name": "Wall slides", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Keep back flat against wall"},
-                ],
-                "restrictions": ["Avoid overhead reaching", "No cross-body movements", "Limit weight-bearing through arm"]
+                ),
+                "restrictions": ("Avoid overhead reaching", "No cross-body movements", "Limit weight-bearing through arm")
             },
             {
                 "phase": 2,
                 "name": "Strengthening & Scapular Control (Weeks 3-6)",
-                "goals": ["Improve scapular muscle balance", "Progress ROM", "Begin rotator cuff strengthening"],
-                "exercises": [
+                "goals": ("Improve scapular muscle balance", "Progress ROM", "Begin rotator cuff strengthening"),
+                "exercises": (
                     {"name": "Serratus anterior wall slides", "sets": 3, "reps": 12, "frequency": "Daily", "notes": "Focus on protraction"},
                     {"name": "Lower trap Y-raises (prone)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Light weight, thumbs up"},
                     {"name": "Face pulls", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Safe AC joint exercise"},
                     {"name": "External rotation (side-lying)", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Light resistance"},
                     {"name": "Scapular plane elevation", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "30-45° angle, not directly overhead"},
-                ],
-                "restrictions": ["Keep elevation < 90° initially", "Avoid bench press/dips"]
+                ),
+                "restrictions": ("Keep elevation < 90° initially", "Avoid bench press/dips")
             },
             {
                 "phase": 3,
                 "name": "Progressive Loading (Weeks 6-12)",
-                "goals": ["Increase strength", "Improve endurance", "Return to functional activities"],
-                "exercises": [
+                "goals": ("Increase strength", "Improve endurance", "Return to functional activities"),
+                "exercises": (
                     {"name": "Landmine press", "sets": 3, "reps": 10, "frequency": "2-3x/week", "notes": "AC-joint safe pressing"},
                     {"name": "Cable rows (all variations)", "sets": 3, "reps": 12, "frequency": "2-3x/week", "notes": "Maintain scapular control"},
                     {"name": "Neutral-grip DB press", "sets": 3, "reps": 10, "frequency": "2x/week", "notes": "Scapular plane"},
                     {"name": "TRX/suspension trainer rows", "sets": 3, "reps": 15, "frequency": "2x/week", "notes": "Body weight progression"},
                     {"name": "Bear crawls", "sets": 3, "reps": "30 sec", "frequency": "2x/week", "notes": "Serratus activation"},
-                ],
-                "restrictions": ["Progress weight slowly", "Monitor for pain flare-ups"]
+                ),
+                "restrictions": ("Progress weight slowly", "Monitor for pain flare-ups")
             },
             {
                 "phase": 4,
                 "name": "Return to Training (Week 12+)",
-                "goals": ["Maintain strength gains", "Prevent reinjury", "Full functional capacity"],
-                "exercises": [
+                "goals": ("Maintain strength gains", "Prevent reinjury", "Full functional capacity"),
+                "exercises": (
                     {"name": "Continue Phase 3 exercises", "sets": 3, "reps": "8-12", "frequency": "2-3x/week", "notes": "Progressive overload via RPE"},
                     {"name": "Sport-specific movements", "sets": 3, "reps": "Varies", "frequency": "As needed", "notes": "Gradually reintroduce activities"},
-                ],
-                "restrictions": ["Permanently avoid flat bench press", "Minimize cross-body loading"]
+                ),
+                "restrictions": ("Permanently avoid flat bench press", "Minimize cross-body loading")
             }
-        ],
-        "key_principles": [
+        ),
+        "key_principles": (
             "Scapular stabilization is foundation",
             "Avoid provocative movements (overhead press, wide-grip bench)",
             "Progressive loading matched to tissue tolerance",
             "RPE-based progression (start RPE 6-7, progress to 8-9)"
-        ]
+        )
     },
     
     "bicep_tendonitis": {
         "name": "Bicep Tendonitis Rehabilitation",
         "overview": "Multimodal approach: eccentric loading, manual therapy, scapular strengthening. Progressive loading matched to pain/irritability.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Pain Management & Load Tolerance (Weeks 1-2)",
-                "goals": ["Reduce pain/inflammation", "Avoid tendon aggravation", "Begin isometric training"],
-                "exercises": [
+                "goals": ("Reduce pain/inflammation", "Avoid tendon aggravation", "Begin isometric training"),
+                "exercises": (
                     {"name": "Isometric bicep hold (90° elbow)", "sets": 3, "reps": "30-45 sec", "frequency": "Daily", "notes": "Sub-maximal, pain-free"},
                     {"name": "Scapular retraction", "sets": 3, "reps": 15, "frequency": "2x/day", "notes": "Reduce anterior shoulder stress"},
                     {"name": "Pec minor stretch (doorway)", "sets": 3, "reps": "30 sec", "frequency": "2x/day", "notes": "Open anterior thorax"},
                     {"name": "Ice after activity", "sets": 1, "reps": "15 min", "frequency": "As needed", "notes": "Reduce inflammation"},
-                ],
-                "restrictions": ["Avoid overhead activities", "No heavy lifting", "Limit cross-body movements"]
+                ),
+                "restrictions": ("Avoid overhead activities", "No heavy lifting", "Limit cross-body movements")
             },
             {
                 "phase": 2,
                 "name": "Eccentric Loading & Mobility (Weeks 2-6)",
-                "goals": ["Progressive tendon loading", "Improve tissue capacity", "Restore ROM"],
-                "exercises": [
+                "goals": ("Progressive tendon loading", "Improve tissue capacity", "Restore ROM"),
+                "exercises": (
                     {"name": "Eccentric bicep curls", "sets": 3, "reps": 10, "frequency": "3x/week", "notes": "Slow 4-5 sec negative, light weight"},
                     {"name": "Bicep stretch (arm extended)", "sets": 3, "reps": "30 sec", "frequency": "Daily", "notes": "Gentle, pain-free"},
                     {"name": "Shoulder flexion ROM", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "Progress overhead gradually"},
                     {"name": "Rotator cuff strengthening", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Light bands/dumbbells"},
-                ],
-                "restrictions": ["Avoid explosive movements", "Long-lever arm exercises only with clearance"]
+                ),
+                "restrictions": ("Avoid explosive movements", "Long-lever arm exercises only with clearance")
             },
             {
                 "phase": 3,
                 "name": "Progressive Resistance (Weeks 6-12)",
-                "goals": ["Build tendon resilience", "Return to functional strength", "Improve shoulder complex coordination"],
-                "exercises": [
-                    {"name": "Heavy slow resistance curls", "sets": 4, "reps": 6-8, "frequency": "2-3x/week", "notes": "Controlled tempo, full ROM"},
+                "goals": ("Build tendon resilience", "Return to functional strength", "Improve shoulder complex coordination"),
+                "exercises": (
+                    {"name": "Heavy slow resistance curls", "sets": 4, "reps": "6-8", "frequency": "2-3x/week", "notes": "Controlled tempo, full ROM"},
                     {"name": "Hammer curls", "sets": 3, "reps": 10, "frequency": "2x/week", "notes": "Neutral grip reduces stress"},
                     {"name": "Scapular strengthening (all planes)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Rows, Y-raises, T-raises"},
                     {"name": "Closed-chain exercises", "sets": 3, "reps": 10, "frequency": "2x/week", "notes": "Push-up variations, planks"},
-                ],
-                "restrictions": ["Monitor pain/irritability", "Adjust load if symptoms increase"]
+                ),
+                "restrictions": ("Monitor pain/irritability", "Adjust load if symptoms increase")
             },
             {
                 "phase": 4,
                 "name": "Return to Activity (Week 12+)",
-                "goals": ["Maintain tendon health", "Full functional capacity", "Prevent recurrence"],
-                "exercises": [
+                "goals": ("Maintain tendon health", "Full functional capacity", "Prevent recurrence"),
+                "exercises": (
                     {"name": "Continue Phase 3 exercises", "sets": 3, "reps": "8-12", "frequency": "2-3x/week", "notes": "Maintenance program"},
                     {"name": "Sport-specific training", "sets": "Varies", "reps": "Varies", "frequency": "As needed", "notes": "Gradual return"},
-                ],
-                "restrictions": ["Avoid sudden increases in training volume"]
+                ),
+                "restrictions": ("Avoid sudden increases in training volume",)
             }
-        ],
-        "key_principles": [
+        ),
+        "key_principles": (
             "Eccentric exercise is most effective intervention",
             "Progressive loading matched to tissue capacity",
             "Address scapular dysfunction (common comorbidity)",
             "Consider dry needling if available"
-        ]
+        )
     },
 
     "cervical_spine_arthritis": {
         "name": "Cervical Spine Arthritis & Cervical Radiculopathy",
         "overview": "Exercise therapy, manual therapy, and postural training. Focus on deep neck flexor/extensor strengthening and ROM.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Pain Reduction & Postural Awareness (Weeks 1-2)",
-                "goals": ["Reduce pain/inflammation", "Improve posture", "Begin gentle ROM"],
-                "exercises": [
+                "goals": ("Reduce pain/inflammation", "Improve posture", "Begin gentle ROM"),
+                "exercises": (
                     {"name": "Chin tucks", "sets": 3, "reps": 15, "frequency": "3-4x/day", "notes": "Tuck chin without flexing head forward"},
                     {"name": "Isometric neck flexion", "sets": 3, "reps": "10-sec hold", "frequency": "2x/day", "notes": "Press hand against forehead, resist"},
                     {"name": "Isometric neck extension", "sets": 3, "reps": "10-sec hold", "frequency": "2x/day", "notes": "Press hand against back of head"},
                     {"name": "Gentle neck rotation", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Pain-free ROM only"},
                     {"name": "Postural correction cues", "sets": "Throughout day", "reps": "N/A", "frequency": "Hourly", "notes": "Neutral spine, avoid forward head posture"},
-                ],
-                "restrictions": ["Avoid prolonged neck flexion (looking down at phone)", "No heavy lifting overhead"]
+                ),
+                "restrictions": ("Avoid prolonged neck flexion (looking down at phone)", "No heavy lifting overhead")
             },
             {
                 "phase": 2,
                 "name": "Strengthening & Mobility (Weeks 2-6)",
-                "goals": ["Strengthen deep neck flexors/extensors", "Improve ROM all planes", "Build endurance"],
-                "exercises": [
+                "goals": ("Strengthen deep neck flexors/extensors", "Improve ROM all planes", "Build endurance"),
+                "exercises": (
                     {"name": "Deep neck flexor training", "sets": 3, "reps": "20-30 sec", "frequency": "Daily", "notes": "Supine, nod head without lifting"},
                     {"name": "Neck extension strengthening", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Prone or seated with resistance"},
                     {"name": "Cervical rotation with resistance", "sets": 3, "reps": 10, "frequency": "3x/week", "notes": "Use light band"},
                     {"name": "Scapular retraction rows", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Reduce cervical load"},
                     {"name": "Thoracic spine extension", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Foam roller or prone cobras"},
-                ],
-                "restrictions": ["Avoid end-range extension if radiculopathy present"]
+                ),
+                "restrictions": ("Avoid end-range extension if radiculopathy present",)
             },
             {
                 "phase": 3,
                 "name": "Progressive Loading & Function (Weeks 6-12)",
-                "goals": ["Increase strength/endurance", "Return to normal activities", "Improve cardiovascular fitness"],
-                "exercises": [
+                "goals": ("Increase strength/endurance", "Return to normal activities", "Improve cardiovascular fitness"),
+                "exercises": (
                     {"name": "Neck endurance training (isometric)", "sets": 3, "reps": "60+ sec", "frequency": "3x/week", "notes": "Multiple angles"},
                     {"name": "Upper trap/levator scapulae strengthening", "sets": 3, "reps": 12, "frequency": "2x/week", "notes": "Shrugs with control"},
                     {"name": "Postural strengthening (standing)", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Wall angels, band pull-aparts"},
                     {"name": "Cardiovascular training", "sets": 1, "reps": "20-30 min", "frequency": "3-5x/week", "notes": "Walking, cycling (proper neck position)"},
-                ],
-                "restrictions": ["Maintain neutral spine during all activities"]
+                ),
+                "restrictions": ("Maintain neutral spine during all activities",)
             },
             {
                 "phase": 4,
                 "name": "Maintenance & Prevention (Week 12+)",
-                "goals": ["Sustain gains", "Prevent recurrence", "Optimize ergonomics"],
-                "exercises": [
-                    {"name": "Continue Phase 3 exercises", "sets": 2-3, "reps": "10-15", "frequency": "2-3x/week", "notes": "Maintenance program"},
+                "goals": ("Sustain gains", "Prevent recurrence", "Optimize ergonomics"),
+                "exercises": (
+                    {"name": "Continue Phase 3 exercises", "sets": "2-3", "reps": "10-15", "frequency": "2-3x/week", "notes": "Maintenance program"},
                     {"name": "Ergonomic adjustments", "sets": "N/A", "reps": "N/A", "frequency": "Ongoing", "notes": "Workstation setup, sleep position"},
-                ],
-                "restrictions": ["Avoid prolonged static postures"]
+                ),
+                "restrictions": ("Avoid prolonged static postures",)
             }
-        ],
-        "key_principles": [
+        ),
+        "key_principles": (
             "Deep neck flexor strengthening is key",
             "Address thoracic spine mobility (often restricted)",
             "Postural correction crucial for long-term success",
             "Manual therapy effective adjunct (if available)"
-        ]
+        )
     },
 
     "scapular_winging": {
         "name": "Scapular Winging Rehabilitation",
         "overview": "Conservative management for serratus anterior, trapezius, or rhomboid weakness. Focus on scapular stabilization, ROM maintenance, and gradual strengthening.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Protection & ROM (Weeks 1-6)",
-                "goals": ["Maintain ROM", "Prevent contracture", "Avoid stretching paralyzed muscle"],
-                "exercises": [
+                "goals": ("Maintain ROM", "Prevent contracture", "Avoid stretching paralyzed muscle"),
+                "exercises": (
                     {"name": "Supine shoulder flexion (passive)", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "Body weight prevents winging"},
                     {"name": "Shoulder rolls", "sets": 3, "reps": 15, "frequency": "2x/day", "notes": "Gentle, pain-free"},
                     {"name": "Scapular protraction (wall)", "sets": 3, "reps": 12, "frequency": "Daily", "notes": "Push-plus position"},
                     {"name": "Avoid serratus stretching", "sets": "N/A", "reps": "N/A", "frequency": "N/A", "notes": "Do NOT stretch affected muscle"},
-                ],
-                "restrictions": ["No overhead activities", "Avoid heavy lifting", "Consider scapular brace (if tolerated)"]
+                ),
+                "restrictions": ("No overhead activities", "Avoid heavy lifting", "Consider scapular brace (if tolerated)")
             },
             {
                 "phase": 2,
                 "name": "Reinnervation & Initial Strengthening (Weeks 6-24)",
-                "goals": ["Promote nerve recovery", "Begin strengthening after reinnervation signs", "Improve motor control"],
-                "exercises": [
+                "goals": ("Promote nerve recovery", "Begin strengthening after reinnervation signs", "Improve motor control"),
+                "exercises": (
                     {"name": "Serratus wall slides (if reinnervation present)", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Only after muscle activation"},
                     {"name": "Scapular push-ups (modified)", "sets": 3, "reps": 8, "frequency": "3x/week", "notes": "Wall or elevated surface"},
                     {"name": "Bear crawl hold", "sets": 3, "reps": "15-30 sec", "frequency": "3x/week", "notes": "Serratus activation"},
                     {"name": "Compensatory strengthening (trap/rhomboids)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Support scapular position"},
-                ],
-                "restrictions": ["Progress only with evidence of reinnervation", "Avoid overstressing recovering muscle"]
+                ),
+                "restrictions": ("Progress only with evidence of reinnervation", "Avoid overstressing recovering muscle")
             },
             {
                 "phase": 3,
                 "name": "Progressive Strengthening (6-24 months)",
-                "goals": ["Build strength/endurance", "Improve functional capacity", "Compensatory strengthening"],
-                "exercises": [
+                "goals": ("Build strength/endurance", "Improve functional capacity", "Compensatory strengthening"),
+                "exercises": (
                     {"name": "Push-up progressions", "sets": 3, "reps": "As able", "frequency": "3x/week", "notes": "Elevate to floor push-ups"},
                     {"name": "Rows (all variations)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Strengthen scapular retractors"},
                     {"name": "Plank variations", "sets": 3, "reps": "30-60 sec", "frequency": "3x/week", "notes": "Serratus endurance"},
                     {"name": "Upper trap/levator scapulae work", "sets": 3, "reps": 12, "frequency": "2x/week", "notes": "Compensatory muscles"},
-                ],
-                "restrictions": ["Recovery is slow (6-24 months)", "Some cases may not fully recover"]
+                ),
+                "restrictions": ("Recovery is slow (6-24 months)", "Some cases may not fully recover")
             },
             {
                 "phase": 4,
                 "name": "Functional Return (24+ months or surgical consideration)",
-                "goals": ["Maximize function", "Determine need for surgical intervention", "Adaptations"],
-                "exercises": [
+                "goals": ("Maximize function", "Determine need for surgical intervention", "Adaptations"),
+                "exercises": (
                     {"name": "Continue Phase 3 exercises", "sets": 3, "reps": "10-15", "frequency": "2-3x/week", "notes": "Maintenance"},
                     {"name": "Task-specific training", "sets": "Varies", "reps": "Varies", "frequency": "As needed", "notes": "Functional activities"},
-                ],
-                "restrictions": ["If no recovery by 24 months, surgical options considered"]
+                ),
+                "restrictions": ("If no recovery by 24 months, surgical options considered",)
             }
-        ],
-        "key_principles": [
+        ),
+        "key_principles": (
             "Conservative management for 6-24 months minimum",
             "Do NOT stretch paralyzed muscle (impairs recovery)",
             "Strengthen compensatory muscles",
             "Scapular brace may help but compliance often poor",
             "Spontaneous recovery 21-78% depending on cause"
-        ]
+        )
     },
 
     "ankle_post_surgery": {
         "name": "Post-Ankle Surgery Rehabilitation",
         "overview": "Phased protocol for ankle ORIF, ligament repair, or arthroscopy. Progressive weight-bearing, ROM, and strengthening.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Immediate Post-Op (Weeks 0-6)",
-                "goals": ["Control swelling", "Protect healing structures", "Maintain proximal strength"],
-                "exercises": [
+                "goals": ("Control swelling", "Protect healing structures", "Maintain proximal strength"),
+                "exercises": (
                     {"name": "Ankle pumps", "sets": 3, "reps": 20, "frequency": "Every 2 hours", "notes": "Toe up, toe down—reduce swelling"},
                     {"name": "Isometric quad sets", "sets": 3, "reps": 15, "frequency": "3x/day", "notes": "Maintain quad strength"},
                     {"name": "Straight leg raises", "sets": 3, "reps": 15, "frequency": "2x/day", "notes": "Hip flexor strength"},
                     {"name": "Towel stretches (gentle)", "sets": 3, "reps": "30 sec", "frequency": "Daily", "notes": "Begin plantar/dorsiflexion ROM"},
                     {"name": "Ice/elevation", "sets": "Multiple", "reps": "15-20 min", "frequency": "3-4x/day", "notes": "Control swelling"},
-                ],
-                "restrictions": ["Non-weight-bearing (NWB) per MD orders", "Boot/cast immobilization", "No driving"]
+                ),
+                "restrictions": ("Non-weight-bearing (NWB) per MD orders", "Boot/cast immobilization", "No driving")
             },
             {
                 "phase": 2,
                 "name": "Progressive Weight-Bearing (Weeks 6-12)",
-                "goals": ["Progress to full weight-bearing", "Restore ROM", "Begin strengthening"],
-                "exercises": [
+                "goals": ("Progress to full weight-bearing", "Restore ROM", "Begin strengthening"),
+                "exercises": (
                     {"name": "Gait training with assistive device", "sets": "Multiple", "reps": "As tolerated", "frequency": "Daily", "notes": "Partial → full WB"},
                     {"name": "AAROM (alphabet tracing)", "sets": 3, "reps": "3x alphabet", "frequency": "2x/day", "notes": "Improve ROM"},
                     {"name": "Calf raises (bilateral)", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Progress to single-leg"},
                     {"name": "Theraband resistance (all planes)", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "DF, PF, inversion, eversion"},
                     {"name": "Balance exercises (bilateral)", "sets": 3, "reps": "30 sec", "frequency": "Daily", "notes": "Single-leg as able"},
-                ],
-                "restrictions": ["No running/jumping", "Protected WB per protocol"]
+                ),
+                "restrictions": ("No running/jumping", "Protected WB per protocol")
             },
             {
                 "phase": 3,
                 "name": "Strengthening & Proprioception (Weeks 12-16)",
-                "goals": ["Build strength/endurance", "Improve balance/proprioception", "Prepare for functional activities"],
-                "exercises": [
+                "goals": ("Build strength/endurance", "Improve balance/proprioception", "Prepare for functional activities"),
+                "exercises": (
                     {"name": "Single-leg calf raises", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Full ankle strength"},
                     {"name": "Single-leg balance (unstable surface)", "sets": 3, "reps": "60 sec", "frequency": "Daily", "notes": "Progress to eyes closed"},
                     {"name": "Lateral band walks", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Hip/ankle stability"},
                     {"name": "Step-ups/step-downs", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Eccentric control"},
                     {"name": "Heel-toe walking", "sets": 3, "reps": "20 steps", "frequency": "Daily", "notes": "ROM + balance"},
-                ],
-                "restrictions": ["No high-impact activities yet"]
+                ),
+                "restrictions": ("No high-impact activities yet",)
             },
             {
                 "phase": 4,
                 "name": "Return to Activity (Week 16+)",
-                "goals": ["Return to sport/activity", "Prevent reinjury", "Full functional capacity"],
-                "exercises": [
+                "goals": ("Return to sport/activity", "Prevent reinjury", "Full functional capacity"),
+                "exercises": (
                     {"name": "Running progression", "sets": "Varies", "reps": "Varies", "frequency": "Per protocol", "notes": "Walk/jog intervals → full run"},
                     {"name": "Agility drills", "sets": 3, "reps": "Varies", "frequency": "3x/week", "notes": "Cone drills, cutting"},
                     {"name": "Plyometrics (box jumps, hops)", "sets": 3, "reps": 10, "frequency": "2x/week", "notes": "Power development"},
                     {"name": "Sport-specific training", "sets": "Varies", "reps": "Varies", "frequency": "As needed", "notes": "Gradual return"},
-                ],
-                "restrictions": ["Functional testing (hop tests) before full return", "Brace/taping as needed"]
+                ),
+                "restrictions": ("Functional testing (hop tests) before full return", "Brace/taping as needed")
             }
-        ],
-        "key_principles": [
+        ),
+        "key_principles": (
             "Early ankle mobilization (post-immobilization) improves outcomes",
             "Progressive weight-bearing protocols vary by surgery type",
             "Proprioception training critical for reinjury prevention",
             "Expect 4-6 months for full return to high-impact activities"
-        ]
+        )
     },
 
     "meniscus_post_surgery": {
         "name": "Post-Meniscus Surgery Rehabilitation",
         "overview": "Protocol varies by tear type (repair vs. partial meniscectomy). Repairs require protected weight-bearing and slower ROM progression.",
-        "phases": [
+        "phases": (
             {
                 "phase": 1,
                 "name": "Immediate Post-Op - MENISCUS REPAIR (Weeks 0-3)",
-                "goals": ["Protect repair", "Control swelling", "Maintain quad strength"],
-                "exercises": [
+                "goals": ("Protect repair", "Control swelling", "Maintain quad strength"),
+                "exercises": (
                     {"name": "Quad sets", "sets": 3, "reps": 20, "frequency": "3x/day", "notes": "Isometric quad activation"},
                     {"name": "Straight leg raises", "sets": 3, "reps": 15, "frequency": "2x/day", "notes": "Keep knee straight"},
                     {"name": "Hamstring sets", "sets": 3, "reps": 15, "frequency": "2x/day", "notes": "Gentle isometric"},
                     {"name": "Ankle pumps", "sets": 3, "reps": 20, "frequency": "Hourly", "notes": "Prevent DVT"},
                     {"name": "PROM/AAROM (0-90°)", "sets": 3, "reps": 10, "frequency": "Daily", "notes": "Limited ROM initially"},
-                ],
-                "restrictions": ["Toe-touch weight-bearing only (repair)", "Brace locked in extension", "ROM limited to 90° flexion"]
+                ),
+                "restrictions": ("Toe-touch weight-bearing only (repair)", "Brace locked in extension", "ROM limited to 90° flexion")
             },
             {
                 "phase": 2,
                 "name": "Protected Weight-Bearing - REPAIR (Weeks 3-8)",
-                "goals": ["Progress WB gradually", "Increase ROM to 125°", "Begin closed-chain exercises"],
-                "exercises": [
+                "goals": ("Progress WB gradually", "Increase ROM to 125°", "Begin closed-chain exercises"),
+                "exercises": (
                     {"name": "Gait training (progressive WB)", "sets": "Multiple", "reps": "As tolerated", "frequency": "Daily", "notes": "25% → 50% → 75% → full WB"},
                     {"name": "Heel slides", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "Progress ROM"},
                     {"name": "Mini-squats (bilateral)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "0-45° flexion"},
                     {"name": "Leg press (light)", "sets": 3, "reps": 15, "frequency": "2x/week", "notes": "Closed-chain strengthening"},
                     {"name": "Stationary bike (low resistance)", "sets": 1, "reps": "10-15 min", "frequency": "Daily", "notes": "ROM + cardiovascular"},
-                ],
-                "restrictions": ["No open-chain quad exercises yet", "Avoid deep squatting", "No pivoting/twisting"]
+                ),
+                "restrictions": ("No open-chain quad exercises yet", "Avoid deep squatting", "No pivoting/twisting")
             },
             {
                 "phase": 3,
                 "name": "Strengthening & ROM - REPAIR (Weeks 8-16)",
-                "goals": ["Full ROM", "Progressive strengthening", "Improve proprioception"],
-                "exercises": [
+                "goals": ("Full ROM", "Progressive strengthening", "Improve proprioception"),
+                "exercises": (
                     {"name": "Full ROM exercises", "sets": 3, "reps": 15, "frequency": "Daily", "notes": "0-135°+ flexion"},
                     {"name": "Leg press (progressive load)", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Build quad strength"},
                     {"name": "Step-ups", "sets": 3, "reps": 12, "frequency": "3x/week", "notes": "Functional strength"},
                     {"name": "Single-leg balance", "sets": 3, "reps": "60 sec", "frequency": "Daily", "notes": "Progress to unstable surface"},
                     {"name": "Hamstring curls", "sets": 3, "reps": 15, "frequency": "3x/week", "notes": "Posterior chain"},
                     {"name": "Open-chain quad exercises (light)", "sets": 3, "reps": 12, "frequency": "2x/week", "notes": "After 12 weeks"},
-                ],
-                "restrictions": ["No running until week 12+", "No cutting/jumping until cleared"]
+                ),
+                "restrictions": ("No running until week 12+", "No cutting/jumping until cleared")
             },
             {
                 "phase": 4,
                 "name": "Return to Sport - REPAIR (4-6+ months)",
-                "goals": ["Return to full activity", "Pass functional tests", "Prevent reinjury"],
-                "exercises": [
+                "goals": ("Return to full activity", "Pass functional tests", "Prevent reinjury"),
+                "exercises": (
                     {"name": "Running progression", "sets": "Varies", "reps": "Varies", "frequency": "Per protocol", "notes": "Gradual return"},
                     {"name": "Agility drills", "sets": 3, "reps": "Varies", "frequency": "3x/week", "notes": "Cutting, pivoting"},
                     {"name": "Plyometrics", "sets": 3, "reps": 10, "frequency": "2-3x/week", "notes": "Box jumps, depth jumps"},
                     {"name": "Sport-specific training", "sets": "Varies", "reps": "Varies", "frequency": "As needed", "notes": "Full clearance from MD"},
-                ],
-                "restrictions": ["Must pass hop tests (>90% limb symmetry)", "Minimum 4-6 months for repair"]
+                ),
+                "restrictions": ("Must pass hop tests (>90% limb symmetry)", "Minimum 4-6 months for repair")
             }
-        ],
+        ),
         "additional_notes": {
             "partial_meniscectomy": "Faster protocol—full WB immediately, ROM unlimited, return to sport 4-8 weeks",
             "repair_variations": "Radial/root tears require 6-9 months due to disrupted hoop stress"
         },
-        "key_principles": [
+        "key_principles": (
             "Repair vs. meniscectomy = vastly different timelines",
             "Protected WB for repairs (hoop stress preservation)",
             "ROM progression slower for repairs to avoid gap formation",
             "~90% return to sport rate for isolated repairs"
-        ]
+        )
     }
-}
+})
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response as indented JSON text"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+def _search_exercises(search_lower: str) -> List[int]:
+    """Return indices into _EXERCISE_NAMES of names containing search_lower"""
+    if "\n" in search_lower:
+        return []
+    hits = []
+    pos = _EXERCISE_HAYSTACK.find(search_lower)
+    while pos != -1:
+        idx = bisect_right(_EXERCISE_OFFSETS, pos) - 1
+        hits.append(idx)
+        if idx + 1 == len(_EXERCISE_OFFSETS):
+            break
+        # Skip to the next name; one hit per exercise is enough
+        pos = _EXERCISE_HAYSTACK.find(search_lower, _EXERCISE_OFFSETS[idx + 1])
+    return hits
+
+@lru_cache(maxsize=512)
+def _classify_exercise(exercise_lower: str) -> Tuple[Optional[bool], Optional[str]]:
+    """Return (safe, category) for a lower-cased exercise name; safe is None if unknown"""
+    if _AC_JOINT_UNSAFE_RE.search(exercise_lower):
+        return False, None
+    
+    # First safe name contained in the input, in library order
+    for safe_ex, cat_idx in zip(_EXERCISE_NAMES_LC, _EXERCISE_CATEGORY_IDX):
+        if safe_ex in exercise_lower:
+            return True, _CATEGORY_NAMES[cat_idx]
+    
+    return None, None
+
 def check_ac_joint_safety(exercise_name: str) -> Dict[str, Any]:
     """Check if exercise is AC-joint safe"""
-    exercise_lower = exercise_name.lower()
-    
-    # Check if explicitly unsafe
-    for unsafe in AC_JOINT_UNSAFE:
-        if unsafe.lower() in exercise_lower:
-            return {
-                "safe": False,
-                "reason": f"❌ {exercise_name} is NOT recommended for AC joint arthritis. Avoid wide-grip and flat bench pressing."
-            }
+    # Exact database entries (any case) are O(1); anything else goes through
+    # the memoized substring classifier
+    exercise_lower = exercise_name.strip().lower()
+    if exercise_lower in _EXACT_UNSAFE:
+        safe, category = False, None
+    elif exercise_lower in _EXACT_SAFE:
+        safe, category = True, _EXACT_SAFE[exercise_lower]
+    else:
+        safe, category = _classify_exercise(exercise_lower)
+    
+    if safe is False:
+        return {
+            "safe": False,
+            "reason": f"❌ {exercise_name} is NOT recommended for AC joint arthritis. Avoid wide-grip and flat bench pressing."
+        }
     
-    # Check if explicitly safe
-    for category, exercises in AC_JOINT_SAFE_EXERCISES.items():
-        for safe_ex in exercises:
-            if safe_ex.lower() in exercise_lower:
-                return {
-                    "safe": True,
-                    "reason": f"✅ {exercise_name} is AC-joint safe ({category} category)."
-                }
+    if safe:
+        return {
+            "safe": True,
+            "reason": f"✅ {exercise_name} is AC-joint safe ({category} category)."
+        }
     
     # Unknown exercise
     return {
@@ -576,31 +690,23 @@ def check_ac_joint_safety(exercise_name: str) -> Dict[str, Any]:
         "reason": f"⚠️  {exercise_name} not in database. Verify with these principles: avoid flat bench press, wide-grip movements, strict overhead press. Prefer scapular-plane pressing (30-45° angle), neutral grips, and landmine variations."
     }
 
-def calculate_hydration_needs(
+@lru_cache(maxsize=1024)
+def _hydration_needs(
     duration_min: int,
     intensity: str,
     temp_f: int,
     sweat_rate: float
 ) -> Dict[str, Any]:
-    """Calculate hydration needs for hyperhidrosis"""
+    """Cached hydration calculation; callers get a copy via calculate_hydration_needs"""
     # Base sweat rate adjustment by intensity
-    intensity_multipliers = {
-        "6 - Very light": 0.7,
-        "7 - Light": 0.8,
-        "8 - Moderate": 1.0,
-        "9 - Hard": 1.3,
-        "10 - Maximum effort": 1.5
-    }
+    rpe = _RPE_TO_INT.get(intensity)
+    intensity_multiplier = _RPE_MULTIPLIER[rpe] if rpe is not None else 1.0
     
-    # Temperature adjustment
-    temp_multiplier = 1.0
-    if temp_f > 80:
-        temp_multiplier = 1.2
-    elif temp_f > 90:
-        temp_multiplier = 1.4
+    # Temperature adjustment (hottest band first)
+    temp_multiplier = next((mult for threshold, mult in _TEMP_MULTIPLIERS if temp_f > threshold), 1.0)
     
     # Calculate fluid loss
-    adjusted_sweat_rate = sweat_rate * intensity_multipliers.get(intensity, 1.0) * temp_multiplier
+    adjusted_sweat_rate = sweat_rate * intensity_multiplier * temp_multiplier
     fluid_loss_lbs = adjusted_sweat_rate * (duration_min / 60)
     fluid_loss_oz = fluid_loss_lbs * 16  # 1 lb = ~16 oz
     
@@ -618,44 +724,84 @@ def calculate_hydration_needs(
         "replace_oz_range": f"{round(replace_oz_min, 1)}-{round(replace_oz_max, 1)}",
         "sodium_mg": sodium_mg,
         "timing": "Distribute over 2-4 hours post-workout",
-        "tips": [
+        "tips": (
             "Include potassium-rich foods (banana, potato)",
             "Magnesium supplement if cramping",
             "Monitor urine color (pale yellow = good hydration)",
-            f"Pre-workout: 16-20 oz 2 hours before, 8-10 oz 15 min before"
-        ]
+            "Pre-workout: 16-20 oz 2 hours before, 8-10 oz 15 min before"
+        )
     }
 
+def calculate_hydration_needs(
+    duration_min: int,
+    intensity: str,
+    temp_f: int,
+    sweat_rate: float
+) -> Dict[str, Any]:
+    """Calculate hydration needs for hyperhidrosis"""
+    # Fresh dict and tips list per call so callers never touch the cached value
+    result = dict(_hydration_needs(duration_min, intensity, temp_f, sweat_rate))
+    result["tips"] = list(result["tips"])
+    return result
+
+_LATE_MEAL_WARNING_TMPL = "\n".join([
+    "🚨 **LATE MEAL GUARDRAIL TRIGGERED**",
+    "   - Eating at {meal_time} may interfere with sleep quality",
+    "   - Consider: 10-15 min walk after eating",
+    "   - Keep portions lighter than usual",
+    "   - Avoid high-fat, high-acid foods",
+    "   - Next time: earlier protein snack (7-8pm) to prevent late binge"
+])
+
+def _parse_hhmm(time_str: str) -> int:
+    """Convert an HH:MM (or H:MM) time string to minutes since midnight"""
+    if len(time_str) == 5 and time_str[2] == ":":
+        return int(time_str[:2]) * 60 + int(time_str[3:])
+    hour, minute = time_str.split(":")
+    return int(hour) * 60 + int(minute)
+
 def check_late_meal_warning(meal_time_str: str) -> Optional[str]:
     """Check if meal is after 9pm and provide guardrail warnings"""
-    hour = int(meal_time_str.split(':')[0])
-    minute = int(meal_time_str.split(':')[1])
-    
-    if hour >= LATE_MEAL_WARNING_HOUR or hour < 6:  # 9pm - 6am
-        warnings = [
-            "🚨 **LATE MEAL GUARDRAIL TRIGGERED**",
-            f"   - Eating at {meal_time_str} may interfere with sleep quality",
-            "   - Consider: 10-15 min walk after eating",
-            "   - Keep portions lighter than usual",
-            "   - Avoid high-fat, high-acid foods",
-            "   - Next time: earlier protein snack (7-8pm) to prevent late binge"
-        ]
-        return "\n".join(warnings)
+    minutes = _parse_hhmm(meal_time_str)
+    
+    if minutes >= LATE_MEAL_WARNING_HOUR * 60 or minutes < 6 * 60:  # 9pm - 6am
+        return _LATE_MEAL_WARNING_TMPL.format(meal_time=meal_time_str)
     return None
 
+# Static markdown blocks shared by every response that uses them
+_SAFE_ALTERNATIVES_MD = "\n".join([
+    "\n**💡 AC-Joint Safe Alternatives:**",
+    "  - Landmine Press",
+    "  - Neutral Grip DB Press (scapular plane)",
+    "  - Floor Press",
+    "  - Face Pulls / Cable Rows"
+])
+
+_LIBRARY_HEADER_MD = "\n".join([
+    "# AC-Joint Safe Exercise Library 💪\n",
+    "**Training Constraints Applied:**",
+    "  - Standing/self-stabilizing lifts preferred",
+    "  - AC-joint safe pressing (scapular plane, neutral grip)",
+    "  - Serratus anterior & lower trapezius emphasis",
+    "  - Landmine exercises approved",
+    "  - RPE-based progression (6-10 scale)\n"
+])
+
+_LIBRARY_AVOID_MD = "\n".join(["### ❌ Exercises to AVOID:", *(f"  - {unsafe}" for unsafe in AC_JOINT_UNSAFE)])
+
 def format_rehab_protocol(condition: str, phase_num: Optional[int], format_type: str) -> str:
     """Format rehab protocol for output"""
     protocol = REHAB_PROTOCOLS.get(condition)
     if not protocol:
-        return json.dumps({"error": "Protocol not found"}, indent=2)
+        return _dumps({"error": "Protocol not found"})
     
     if format_type == "json":
         if phase_num:
-            return json.dumps({
+            return _dumps({
                 "condition": protocol["name"],
                 "phase": protocol["phases"][phase_num - 1]
-            }, indent=2)
-        return json.dumps(protocol, indent=2)
+            })
+        return _dumps(protocol)
     
     # Markdown format
     output = [f"# {protocol['name']}\n"]
@@ -665,28 +811,83 @@ def format_rehab_protocol(condition: str, phase_num: Optional[int], format_type:
         # Single phase
         phase = protocol["phases"][phase_num - 1]
         output.append(f"## Phase {phase['phase']}: {phase['name']}\n")
-        output.append(f"**Goals:**\n" + "\n".join(f"  - {g}" for g in phase['goals']))
-        output.append(f"\n**Exercises:**\n")
-        for ex in phase['exercises']:
-            output.append(f"- **{ex['name']}**")
-            output.append(f"  - Sets: {ex['sets']} | Reps: {ex['reps']} | Frequency: {ex['frequency']}")
-            output.append(f"  - Notes: {ex['notes']}")
-        output.append(f"\n**Restrictions:**\n" + "\n".join(f"  - {r}" for r in phase['restrictions']))
+        output.append("**Goals:**\n" + "\n".join(f"  - {g}" for g in phase['goals']))
+        output.append("\n**Exercises:**\n")
+        output.extend(
+            f"- **{ex['name']}**\n"
+            f"  - Sets: {ex['sets']} | Reps: {ex['reps']} | Frequency: {ex['frequency']}\n"
+            f"  - Notes: {ex['notes']}"
+            for ex in phase['exercises']
+        )
+        output.append("\n**Restrictions:**\n" + "\n".join(f"  - {r}" for r in phase['restrictions']))
     else:
         # All phases
         for phase in protocol['phases']:
             output.append(f"\n## Phase {phase['phase']}: {phase['name']}")
             output.append(f"**Goals:** {', '.join(phase['goals'])}")
-            output.append(f"\n**Key Exercises:**")
-            for ex in phase['exercises'][:3]:  # Show first 3 per phase
-                output.append(f"  - {ex['name']} ({ex['sets']} sets x {ex['reps']})")
+            output.append("\n**Key Exercises:**")
+            # Show first 3 per phase
+            output.extend(f"  - {ex['name']} ({ex['sets']} sets x {ex['reps']})" for ex in phase['exercises'][:3])
         
-        output.append(f"\n## Key Principles")
-        for principle in protocol.get('key_principles', []):
-            output.append(f"- {principle}")
+        output.append("\n## Key Principles")
+        output.extend(f"- {principle}" for principle in protocol.get('key_principles', ()))
+    
+    return "\n".join(output)
+
+@lru_cache(maxsize=256)
+def format_exercise_library(category: Optional[str], search_term: Optional[str], format_type: str) -> str:
+    """Format exercise library for output (cached; the library is static)"""
+    # Output label -> AC_JOINT_SAFE_EXERCISES key for the categories to show
+    if category:
+        key = _CATEGORY_KEY.get(category)
+        sources = {category: key} if key in AC_JOINT_SAFE_EXERCISES else {}
+    else:
+        sources = {key: key for key in AC_JOINT_SAFE_EXERCISES}
+    
+    if search_term:
+        # Group hits by category key, preserving library order
+        hits: Dict[str, List[str]] = {}
+        for idx in _search_exercises(search_term.lower()):
+            hits.setdefault(_CATEGORY_NAMES[_EXERCISE_CATEGORY_IDX[idx]], []).append(_EXERCISE_NAMES[idx])
+        exercises_to_show = {label: hits[key] for label, key in sources.items() if key in hits}
+    else:
+        exercises_to_show = {label: AC_JOINT_SAFE_EXERCISES[key] for label, key in sources.items()}
+    
+    if format_type == "json":
+        return _dumps({"exercises": exercises_to_show, "unsafe_exercises": AC_JOINT_UNSAFE})
+    
+    # Markdown format
+    output = [_LIBRARY_HEADER_MD]
+    for cat, ex_list in exercises_to_show.items():
+        output.append(f"## {cat.replace('_', ' ').title()}")
+        output.extend(f"  - {exercise}" for exercise in ex_list)
+        output.append("")
+    output.append(_LIBRARY_AVOID_MD)
     
     return "\n".join(output)
 
+def _precompute_rehab_outputs() -> Dict[Tuple[str, Optional[int], str], str]:
+    """Render every protocol, whole and per phase, in both formats"""
+    rendered = {}
+    for condition, protocol in REHAB_PROTOCOLS.items():
+        for phase_num in (None, *range(1, len(protocol["phases"]) + 1)):
+            for format_type in ("markdown", "json"):
+                rendered[(condition, phase_num, format_type)] = format_rehab_protocol(condition, phase_num, format_type)
+    return rendered
+
+# get_rehab_protocol serves these pre-rendered responses. REHAB_PROTOCOLS is only
+# read-only at the top level; the protocol and phase dicts inside it are static
+# by convention and must not be edited at runtime, or these will go stale
+_PROTOCOL_RENDERED = _precompute_rehab_outputs()
+
+# Unfiltered library views (no search term) for every category, in both formats;
+# only searches go through format_exercise_library at request time
+_LIBRARY_RENDERED: Dict[Tuple[Optional[str], str], str] = {
+    (category, format_type): format_exercise_library.__wrapped__(category, None, format_type)
+    for category in (None, *get_args(ExerciseCategory))
+    for format_type in get_args(ResponseFormat)
+}
+
 # ============================================================================
 # MCP TOOLS
 # ============================================================================
@@ -729,17 +930,17 @@ async def log_workout(params: LogWorkoutInput) -> str:
             "sets": params.sets,
             "reps": params.reps,
             "weight_lbs": params.weight_lbs,
-            "rpe": params.rpe.value,
+            "rpe": params.rpe,
             "notes": params.notes,
             "ac_joint_safe": safety_check["safe"]
         }
         
-        if params.response_format == ResponseFormat.JSON:
-            return json.dumps({
+        if params.response_format == "json":
+            return _dumps({
                 "status": "logged",
                 "workout": workout_entry,
                 "safety_assessment": safety_check
-            }, indent=2)
+            })
         
         # Markdown format
         output = ["## Workout Logged ✅\n"]
@@ -747,19 +948,15 @@ async def log_workout(params: LogWorkoutInput) -> str:
         output.append(f"**Volume:** {params.sets} sets × {params.reps} reps")
         if params.weight_lbs:
             output.append(f"**Load:** {params.weight_lbs} lbs")
-        output.append(f"**Intensity:** {params.rpe.value}")
+        output.append(f"**Intensity:** {params.rpe}")
         if params.notes:
             output.append(f"**Notes:** {params.notes}")
         
-        output.append(f"\n### AC Joint Safety Assessment")
+        output.append("\n### AC Joint Safety Assessment")
         output.append(safety_check["reason"])
         
         if not safety_check["safe"]:
-            output.append("\n**💡 AC-Joint Safe Alternatives:**")
-            output.append("  - Landmine Press")
-            output.append("  - Neutral Grip DB Press (scapular plane)")
-            output.append("  - Floor Press")
-            output.append("  - Face Pulls / Cable Rows")
+            output.append(_SAFE_ALTERNATIVES_MD)
         
         return "\n".join(output)
         
@@ -791,35 +988,31 @@ async def calculate_hydration(params: CalculateHydrationInput) -> str:
     try:
         hydration_needs = calculate_hydration_needs(
             params.workout_duration_minutes,
-            params.intensity.value,
+            params.intensity,
             params.ambient_temp_f,
             params.sweat_rate_lbs_per_hour
         )
         
-        if params.response_format == ResponseFormat.JSON:
-            return json.dumps(hydration_needs, indent=2)
+        if params.response_format == "json":
+            return _dumps(hydration_needs)
         
         # Markdown format
-        output = ["## Hydration Protocol 💧\n"]
-        output.append(f"**Workout Duration:** {params.workout_duration_minutes} minutes")
-        output.append(f"**Intensity:** {params.intensity.value}")
-        output.append(f"**Temperature:** {params.ambient_temp_f}°F")
-        output.append(f"**Adjusted Sweat Rate:** {hydration_needs['sweat_rate_adjusted']} lbs/hour\n")
-        
-        output.append(f"### Fluid Loss Estimate")
-        output.append(f"- **Total Loss:** {hydration_needs['fluid_loss_lbs']} lbs ({hydration_needs['fluid_loss_oz']} oz)")
-        output.append(f"- **Replace:** {hydration_needs['replace_oz_range']} oz")
-        output.append(f"- **Timing:** {hydration_needs['timing']}\n")
-        
-        output.append(f"### Sodium Target")
-        output.append(f"- **Sodium:** {hydration_needs['sodium_mg']} mg during/after workout")
-        output.append(f"- **Daily Goal (training days):** 3,000-5,000 mg\n")
-        
-        output.append(f"### Hydration Tips")
-        for tip in hydration_needs['tips']:
-            output.append(f"  - {tip}")
-        
-        return "\n".join(output)
+        return "\n".join([
+            "## Hydration Protocol 💧\n",
+            f"**Workout Duration:** {params.workout_duration_minutes} minutes",
+            f"**Intensity:** {params.intensity}",
+            f"**Temperature:** {params.ambient_temp_f}°F",
+            f"**Adjusted Sweat Rate:** {hydration_needs['sweat_rate_adjusted']} lbs/hour\n",
+            "### Fluid Loss Estimate",
+            f"- **Total Loss:** {hydration_needs['fluid_loss_lbs']} lbs ({hydration_needs['fluid_loss_oz']} oz)",
+            f"- **Replace:** {hydration_needs['replace_oz_range']} oz",
+            f"- **Timing:** {hydration_needs['timing']}\n",
+            "### Sodium Target",
+            f"- **Sodium:** {hydration_needs['sodium_mg']} mg during/after workout",
+            "- **Daily Goal (training days):** 3,000-5,000 mg\n",
+            "### Hydration Tips",
+            *(f"  - {tip}" for tip in hydration_needs['tips'])
+        ])
         
     except Exception as e:
         return f"Error calculating hydration: {str(e)}"
@@ -859,27 +1052,28 @@ async def log_nutrition(params: LogNutritionInput) -> str:
         
         late_meal_warning = check_late_meal_warning(params.meal_time)
         
-        if params.response_format == ResponseFormat.JSON:
-            return json.dumps({
+        if params.response_format == "json":
+            return _dumps({
                 "status": "logged",
                 "meal": meal_entry,
                 "late_meal_warning": late_meal_warning is not None,
                 "warning_message": late_meal_warning
-            }, indent=2)
+            })
         
         # Markdown format
-        output = ["## Meal Logged 🍽️\n"]
-        output.append(f"**Time:** {params.meal_time}")
-        output.append(f"**Meal:** {params.meal_description}")
+        output = [
+            "## Meal Logged 🍽️\n",
+            f"**Time:** {params.meal_time}",
+            f"**Meal:** {params.meal_description}"
+        ]
         
-        if params.protein_g or params.carbs_g or params.fat_g:
-            output.append(f"\n**Macros:**")
-            if params.protein_g:
-                output.append(f"  - Protein: {params.protein_g}g")
-            if params.carbs_g:
-                output.append(f"  - Carbs: {params.carbs_g}g")
-            if params.fat_g:
-                output.append(f"  - Fat: {params.fat_g}g")
+        macros = [
+            f"  - {label}: {grams}g"
+            for label, grams in (("Protein", params.protein_g), ("Carbs", params.carbs_g), ("Fat", params.fat_g))
+            if grams
+        ]
+        if macros:
+            output += ["\n**Macros:**", *macros]
             if params.calories:
                 output.append(f"  - **Total:** {params.calories} cal")
         
@@ -915,56 +1109,15 @@ async def get_exercise_library(params: GetExerciseLibraryInput) -> str:
         Filtered exercise list with safety notes
     """
     try:
-        exercises_to_show = {}
-        
-        if params.category:
-            # Map category enum to dictionary key
-            category_map = {
-                ExerciseCategory.PRESSING: "pressing",
-                ExerciseCategory.PULLING: "pulling",
-                ExerciseCategory.LOWER_BODY: "lower_body_standing",
-                ExerciseCategory.SERRATUS_FOCUS: "serratus_lower_trap_focus",
-                ExerciseCategory.CORE: "core_standing"
-            }
-            key = category_map.get(params.category)
-            if key and key in AC_JOINT_SAFE_EXERCISES:
-                exercises_to_show[params.category.value] = AC_JOINT_SAFE_EXERCISES[key]
-        else:
-            exercises_to_show = AC_JOINT_SAFE_EXERCISES
-        
-        # Apply search filter if provided
-        if params.search_term:
-            filtered = {}
-            search_lower = params.search_term.lower()
-            for cat, ex_list in exercises_to_show.items():
-                matching = [ex for ex in ex_list if search_lower in ex.lower()]
-                if matching:
-                    filtered[cat] = matching
-            exercises_to_show = filtered
-        
-        if params.response_format == ResponseFormat.JSON:
-            return json.dumps({"exercises": exercises_to_show, "unsafe_exercises": AC_JOINT_UNSAFE}, indent=2)
-        
-        # Markdown format
-        output = ["# AC-Joint Safe Exercise Library 💪\n"]
-        output.append("**Training Constraints Applied:**")
-        output.append("  - Standing/self-stabilizing lifts preferred")
-        output.append("  - AC-joint safe pressing (scapular plane, neutral grip)")
-        output.append("  - Serratus anterior & lower trapezius emphasis")
-        output.append("  - Landmine exercises approved")
-        output.append("  - RPE-based progression (6-10 scale)\n")
-        
-        for category, ex_list in exercises_to_show.items():
-            output.append(f"## {category.replace('_', ' ').title()}")
-            for exercise in ex_list:
-                output.append(f"  - {exercise}")
-            output.append("")
-        
-        output.append("### ❌ Exercises to AVOID:")
-        for unsafe in AC_JOINT_UNSAFE:
-            output.append(f"  - {unsafe}")
-        
-        return "\n".join(output)
+        if not params.search_term:
+            result = _LIBRARY_RENDERED.get((params.category, params.response_format))
+            if result is not None:
+                return result
+        return format_exercise_library(
+            params.category,
+            params.search_term,
+            params.response_format
+        )
         
     except Exception as e:
         return f"Error retrieving exercise library: {str(e)}"
@@ -999,11 +1152,10 @@ async def get_rehab_protocol(params: GetRehabProtocolInput) -> str:
         Complete rehab protocol with exercises, progressions, and clinical notes
     """
     try:
-        result = format_rehab_protocol(
-            params.condition.value,
-            params.phase,
-            params.response_format.value
-        )
+        key = (params.condition, params.phase, params.response_format)
+        result = _PROTOCOL_RENDERED.get(key)
+        if result is None:
+            result = format_rehab_protocol(*key)
         return result
         
     except Exception as e: